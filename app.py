@@ -1,9 +1,12 @@
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from html import escape
+
+import numpy as np
 import streamlit as st
-from io import BytesIO
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib import colors
+
+from report import build_pdf, fmt_gbp
+from scoring import score_options
 
 st.set_page_config(page_title="DECIDR by Felix GRC", page_icon="✅", layout="centered")
 
@@ -28,9 +31,17 @@ with st.form("inputs"):
     include_battery = st.checkbox("Include battery storage in options", value=True)
     submitted = st.form_submit_button("Calculate DECIDR Recommendation")
 
-def fmt_gbp(x: float) -> str:
-    return f"£{x:,.0f}"
-
+@dataclass(slots=True)
+class Option:
+    name: str
+    capex: float
+    annual_savings: float
+    payback_years: float  # -1.0 when there are no savings to pay back CAPEX
+    co2_saved_t: float
+    notes: str
+    score: float = 0.0
+
+@st.cache_data(show_spinner=False, max_entries=128)
 def compute_options(annual_bill: float, annual_kwh: float, budget: float, feasibility: str, include_batt: bool):
     """
     Simple, transparent pilot logic.
@@ -55,7 +66,7 @@ def compute_options(annual_bill: float, annual_kwh: float, budget: float, feasib
         capex_solar_batt = budget
 
     annual_savings = annual_bill * save_frac
-    payback = (capex_solar_batt / annual_savings) if annual_savings > 0 else float("inf")
+    payback = (capex_solar_batt / annual_savings) if annual_savings > 0 else -1.0
 
     # CO2 proxy: 0.20 kg CO2e per kWh (grid average varies; this is a placeholder)
     co2_factor = 0.20
@@ -64,156 +75,113 @@ def compute_options(annual_bill: float, annual_kwh: float, budget: float, feasib
     # Option 2: Renewable PPA (low CAPEX, moderate savings)
     capex_ppa = 25000.0
     savings_ppa = annual_bill * (0.18 * feas_mult)
-    payback_ppa = (capex_ppa / savings_ppa) if savings_ppa > 0 else float("inf")
+    payback_ppa = (capex_ppa / savings_ppa) if savings_ppa > 0 else -1.0
     co2_saved_ppa_t = (annual_kwh * 0.30 * co2_factor) / 1000.0  # contractual green fraction proxy
 
     # Option 3: Offsets (no savings, but carbon compliance)
     capex_offsets = annual_kwh * co2_factor/1000.0 * 30.0  # £30/tonne proxy
     savings_offsets = 0.0
-    payback_offsets = float("inf")
+    payback_offsets = -1.0
     co2_saved_offsets_t = (annual_kwh * co2_factor)/1000.0  # claimable offset tonnes
 
-    options = [
-        {
-            "name": "Install Solar + Battery" if include_batt else "Install Solar (no battery)",
-            "capex": capex_solar_batt,
-            "annual_savings": annual_savings,
-            "payback_years": payback,
-            "co2_saved_t": co2_saved_t,
-            "notes": "Phased to match budget." if phased else "On-site generation reduces bills and exposure to volatility."
-        },
-        {
-            "name": "Renewable PPA (Power Purchase Agreement)",
-            "capex": capex_ppa,
-            "annual_savings": savings_ppa,
-            "payback_years": payback_ppa,
-            "co2_saved_t": co2_saved_ppa_t,
-            "notes": "Low CAPEX; contractual green supply; depends on counterparty and terms."
-        },
-        {
-            "name": "Buy Verified Offsets",
-            "capex": capex_offsets,
-            "annual_savings": savings_offsets,
-            "payback_years": payback_offsets,
-            "co2_saved_t": co2_saved_offsets_t,
-            "notes": "Improves reporting but does not reduce energy costs; quality varies."
-        },
+    # Options are held column-wise (one array per metric) so scoring and ranking stay vectorised
+    # as the candidate set grows; names/notes live in parallel Python lists.
+    names = [
+        "Install Solar + Battery" if include_batt else "Install Solar (no battery)",
+        "Renewable PPA (Power Purchase Agreement)",
+        "Buy Verified Offsets",
     ]
-
-    # Score: maximise savings, minimise payback, maximise CO2 saved, penalise CAPEX over budget already handled
-    for o in options:
-        pb = o["payback_years"]
-        pb_score = 0 if math.isinf(pb) else max(0.0, 10.0 - pb)  # <=10 years better
-        o["score"] = (o["annual_savings"]/max(annual_bill,1.0))*10.0 + pb_score + (o["co2_saved_t"]/max((annual_kwh*co2_factor/1000.0),1e-6))*5.0
-
-    options_sorted = sorted(options, key=lambda x: x["score"], reverse=True)
-    return options_sorted
-
-def build_pdf(org, location, inputs, options_sorted, chosen):
-    styles = getSampleStyleSheet()
-    buff = BytesIO()
-    doc = SimpleDocTemplate(buff, pagesize=A4, rightMargin=36, leftMargin=36, topMargin=36, bottomMargin=36)
-    story = []
-
-    story.append(Paragraph("DECIDR Decision Report", styles["Title"]))
-    story.append(Paragraph("DECIDR by Felix GRC", styles["Heading2"]))
-    story.append(Spacer(1, 10))
-    meta = f"Client: {org or '—'} | Location: {location} | Generated: {inputs['generated_at']}"
-    story.append(Paragraph(meta, styles["Normal"]))
-    story.append(Spacer(1, 14))
-
-    story.append(Paragraph("Inputs", styles["Heading3"]))
-    data = [
-        ["Annual electricity (kWh)", f"{inputs['annual_elec_kwh']:,.0f}"],
-        ["Annual bill (£)", fmt_gbp(inputs["annual_bill_gbp"])],
-        ["Target year", str(inputs["carbon_target_year"])],
-        ["Budget (£)", fmt_gbp(inputs["budget_gbp"])],
-        ["Solar feasibility", inputs["feasibility"]],
+    notes = [
+        "Phased to match budget." if phased else "On-site generation reduces bills and exposure to volatility.",
+        "Low CAPEX; contractual green supply; depends on counterparty and terms.",
+        "Improves reporting but does not reduce energy costs; quality varies.",
     ]
-    t = Table(data, colWidths=[220, 260])
-    t.setStyle(TableStyle([
-        ("BACKGROUND", (0,0), (-1,0), colors.whitesmoke),
-        ("GRID", (0,0), (-1,-1), 0.5, colors.grey),
-        ("PADDING", (0,0), (-1,-1), 6),
-    ]))
-    story.append(t)
-    story.append(Spacer(1, 14))
-
-    story.append(Paragraph("Recommendation", styles["Heading3"]))
-    rec = (
-        f"<b>Best option:</b> {chosen['name']}<br/>"
-        f"<b>CAPEX:</b> {fmt_gbp(chosen['capex'])}<br/>"
-        f"<b>Annual savings:</b> {fmt_gbp(chosen['annual_savings'])}<br/>"
-        f"<b>Payback:</b> {'—' if math.isinf(chosen['payback_years']) else f'{chosen['payback_years']:.2f} years'}<br/>"
-        f"<b>CO₂ reduction (proxy):</b> {chosen['co2_saved_t']:.0f} tCO₂e/yr<br/>"
-        f"<b>Notes:</b> {chosen['notes']}"
+    capex = np.array([capex_solar_batt, capex_ppa, capex_offsets])
+    savings = np.array([annual_savings, savings_ppa, savings_offsets])
+    payback = np.array([payback, payback_ppa, payback_offsets])
+    co2 = np.array([co2_saved_t, co2_saved_ppa_t, co2_saved_offsets_t])
+
+    # Score: penalise CAPEX over budget already handled above
+    score = score_options(savings, payback, co2, annual_bill, annual_kwh*co2_factor/1000.0)
+
+    # Top-k by partition (O(n)), then order just those k. argpartition leaves the k indices in arbitrary
+    # order, so restore original option order before the stable sort so tied options keep that order.
+    k = min(3, len(score))
+    idx = np.argpartition(-score, k - 1)[:k]
+    idx.sort()
+    idx = idx[np.argsort(-score[idx], kind="stable")]
+
+    options_sorted = tuple(
+        Option(
+            name=names[i],
+            capex=float(capex[i]),
+            annual_savings=float(savings[i]),
+            payback_years=float(payback[i]),
+            co2_saved_t=float(co2[i]),
+            notes=notes[i],
+            score=float(score[i]),
+        )
+        for i in idx
     )
-    story.append(Paragraph(rec, styles["BodyText"]))
-    story.append(Spacer(1, 14))
-
-    story.append(Paragraph("Top options (ranked)", styles["Heading3"]))
-    table_data = [["Rank", "Option", "CAPEX", "Annual savings", "Payback (yrs)", "CO₂ saved (t/yr)"]]
-    for i, o in enumerate(options_sorted[:3], start=1):
-        table_data.append([
-            str(i),
-            o["name"],
-            fmt_gbp(o["capex"]),
-            fmt_gbp(o["annual_savings"]),
-            "∞" if math.isinf(o["payback_years"]) else f"{o['payback_years']:.2f}",
-            f"{o['co2_saved_t']:.0f}",
-        ])
-    tt = Table(table_data, colWidths=[40, 180, 85, 95, 75, 80])
-    tt.setStyle(TableStyle([
-        ("BACKGROUND", (0,0), (-1,0), colors.whitesmoke),
-        ("GRID", (0,0), (-1,-1), 0.5, colors.grey),
-        ("PADDING", (0,0), (-1,-1), 5),
-        ("VALIGN", (0,0), (-1,-1), "TOP"),
-    ]))
-    story.append(tt)
-    story.append(Spacer(1, 14))
-
-    story.append(Paragraph("Disclaimer", styles["Heading3"]))
-    story.append(Paragraph(
-        "This pilot report uses simplified assumptions suitable for early-stage decisioning. "
-        "For procurement, financing, and compliance submissions, DECIDR should be calibrated with site surveys, tariffs, "
-        "half-hourly consumption profiles, and verified emissions factors.",
-        styles["BodyText"]
-    ))
-
-    doc.build(story)
-    buff.seek(0)
-    return buff
+    return options_sorted
 
 if submitted:
-    options_sorted = compute_options(annual_bill_gbp, annual_elec_kwh, budget_gbp, roof_or_land, include_battery)
+    # Results live in session state so they survive later reruns (e.g. the download click, where
+    # submitted is False); options and PDF are only recomputed when the submitted values change.
+    inputs_key = (annual_bill_gbp, annual_elec_kwh, budget_gbp, roof_or_land, include_battery,
+                  org_name, location, carbon_target_year)
+    if st.session_state.get("last_key") != inputs_key:
+        st.session_state["last_key"] = inputs_key
+        st.session_state["options_sorted"] = compute_options(
+            annual_bill_gbp, annual_elec_kwh, budget_gbp, roof_or_land, include_battery
+        )
+        st.session_state["pdf_bytes"] = None  # built below, after the results have rendered
+
+if "last_key" in st.session_state:
+    options_sorted = st.session_state["options_sorted"]
     chosen = options_sorted[0]
 
     st.markdown("## Results")
-    c1, c2, c3 = st.columns(3)
-    c1.metric("Best option", chosen["name"])
-    c2.metric("CAPEX", fmt_gbp(chosen["capex"]))
-    c3.metric("Payback", "—" if math.isinf(chosen["payback_years"]) else f"{chosen['payback_years']:.2f} yrs")
+    # Headline metrics and summary are single markdown elements rather than columns + st.metric widgets.
+    payback_s = "—" if chosen.payback_years < 0 else f"{chosen.payback_years:.2f} yrs"
+    metrics = (("Best option", chosen.name), ("CAPEX", fmt_gbp(chosen.capex)), ("Payback", payback_s))
+    st.markdown(
+        "<div style='display:flex;gap:24px'>"
+        + "".join(
+            f"<div><div style='font-size:0.875rem;opacity:0.6'>{label}</div>"
+            f"<div style='font-size:2.25rem;line-height:1.2'>{escape(value)}</div></div>"
+            for label, value in metrics
+        )
+        + "</div>",
+        unsafe_allow_html=True,
+    )
 
-    st.write("### Summary")
-    st.write(f"- **Annual savings:** {fmt_gbp(chosen['annual_savings'])}")
-    st.write(f"- **CO₂ reduction (proxy):** {chosen['co2_saved_t']:.0f} tCO₂e/year")
-    st.write(f"- **Notes:** {chosen['notes']}")
+    st.markdown(
+        "### Summary\n"
+        f"- **Annual savings:** {fmt_gbp(chosen.annual_savings)}\n"
+        f"- **CO₂ reduction (proxy):** {chosen.co2_saved_t:.0f} tCO₂e/year\n"
+        f"- **Notes:** {chosen.notes}"
+    )
 
     st.write("### Top 3 options")
     for i, o in enumerate(options_sorted[:3], start=1):
-        st.write(f"**{i}. {o['name']}** — CAPEX {fmt_gbp(o['capex'])}, savings {fmt_gbp(o['annual_savings'])}, "
-                 f"payback {'∞' if math.isinf(o['payback_years']) else f'{o['payback_years']:.2f} yrs'}")
+        st.write(f"**{i}. {o.name}** — CAPEX {fmt_gbp(o.capex)}, savings {fmt_gbp(o.annual_savings)}, "
+                 f"payback {'∞' if o.payback_years < 0 else f'{o.payback_years:.2f} yrs'}")
 
     st.markdown("## Download report")
-    inputs = {
-        "annual_elec_kwh": float(annual_elec_kwh),
-        "annual_bill_gbp": float(annual_bill_gbp),
-        "carbon_target_year": int(carbon_target_year),
-        "budget_gbp": float(budget_gbp),
-        "feasibility": roof_or_land,
-        "generated_at": __import__("datetime").datetime.utcnow().strftime("%Y-%m-%d %H:%M UTC"),
-    }
-    pdf_bytes = build_pdf(org_name, location, inputs, options_sorted, chosen)
+    pdf_bytes = st.session_state["pdf_bytes"]
+    if pdf_bytes is None:
+        # Form widgets keep their last submitted values, so these match last_key.
+        inputs = {
+            "annual_elec_kwh": float(annual_elec_kwh),
+            "annual_bill_gbp": float(annual_bill_gbp),
+            "carbon_target_year": int(carbon_target_year),
+            "budget_gbp": float(budget_gbp),
+            "feasibility": roof_or_land,
+            "generated_at": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC"),
+        }
+        pdf_bytes = build_pdf(org_name, location, inputs, options_sorted, chosen)
+        st.session_state["pdf_bytes"] = pdf_bytes
     st.download_button(
         label="Download DECIDR PDF (GBP)",
         data=pdf_bytes,
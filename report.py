@@ -0,0 +1,114 @@
+from io import BytesIO
+from string import Template
+from xml.sax.saxutils import escape
+
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib import colors
+
+# Styles are built once, when this module is first imported. Unlike app.py, which Streamlit re-executes
+# on every rerun, an imported module stays cached in sys.modules for the process. Table.setStyle only
+# reads the TableStyles, so they are safe to share. Paragraphs are not: ReportLab sets canv/_frame on each
+# flowable while building, and sessions build concurrently, so build_pdf creates its own from the text below.
+_STYLES = getSampleStyleSheet()
+_INPUT_TABLE_STYLE = TableStyle([
+    ("BACKGROUND", (0,0), (-1,0), colors.whitesmoke),
+    ("GRID", (0,0), (-1,-1), 0.5, colors.grey),
+    ("PADDING", (0,0), (-1,-1), 6),
+])
+_RANK_TABLE_STYLE = TableStyle([
+    ("BACKGROUND", (0,0), (-1,0), colors.whitesmoke),
+    ("GRID", (0,0), (-1,-1), 0.5, colors.grey),
+    ("PADDING", (0,0), (-1,-1), 5),
+    ("VALIGN", (0,0), (-1,-1), "TOP"),
+])
+_TITLE_TEXT = "DECIDR Decision Report"
+_SUBTITLE_TEXT = "DECIDR by Felix GRC"
+_DISCLAIMER_TEXT = (
+    "This pilot report uses simplified assumptions suitable for early-stage decisioning. "
+    "For procurement, financing, and compliance submissions, DECIDR should be calibrated with site surveys, tariffs, "
+    "half-hourly consumption profiles, and verified emissions factors."
+)
+# Paragraph markup is fixed; only the substituted (pre-escaped) values change per report.
+_META_TMPL = Template("Client: $org | Location: $location | Generated: $generated_at")
+_REC_TMPL = Template(
+    "<b>Best option:</b> $name<br/>"
+    "<b>CAPEX:</b> $capex<br/>"
+    "<b>Annual savings:</b> $savings<br/>"
+    "<b>Payback:</b> $payback<br/>"
+    "<b>CO₂ reduction (proxy):</b> $co2 tCO₂e/yr<br/>"
+    "<b>Notes:</b> $notes"
+)
+_RANK_TABLE_HEADER = ["Rank", "Option", "CAPEX", "Annual savings", "Payback (yrs)", "CO₂ saved (t/yr)"]
+
+def fmt_gbp(x: float) -> str:
+    return f"£{x:,.0f}"
+
+def build_pdf(org, location, inputs, options_sorted, chosen):
+    styles = _STYLES
+    fmt = fmt_gbp
+    buff = BytesIO()
+    doc = SimpleDocTemplate(buff, pagesize=A4, rightMargin=36, leftMargin=36, topMargin=36, bottomMargin=36)
+    story = []
+
+    story.append(Paragraph(_TITLE_TEXT, styles["Title"]))
+    story.append(Paragraph(_SUBTITLE_TEXT, styles["Heading2"]))
+    story.append(Spacer(1, 10))
+    meta = _META_TMPL.substitute(org=escape(org) or "—", location=location, generated_at=inputs["generated_at"])
+    story.append(Paragraph(meta, styles["Normal"]))
+    story.append(Spacer(1, 14))
+
+    story.append(Paragraph("Inputs", styles["Heading3"]))
+    bill_s, budget_s = fmt(inputs["annual_bill_gbp"]), fmt(inputs["budget_gbp"])
+    data = [
+        ["Annual electricity (kWh)", f"{inputs['annual_elec_kwh']:,.0f}"],
+        ["Annual bill (£)", bill_s],
+        ["Target year", str(inputs["carbon_target_year"])],
+        ["Budget (£)", budget_s],
+        ["Solar feasibility", inputs["feasibility"]],
+    ]
+    t = Table(data, colWidths=[220, 260])
+    t.setStyle(_INPUT_TABLE_STYLE)
+    story.append(t)
+    story.append(Spacer(1, 14))
+
+    # Format currency for the ranked options once; the recommendation reuses the best option's strings.
+    top = options_sorted[:3]
+    capex_strs = [fmt(o.capex) for o in top]
+    save_strs = [fmt(o.annual_savings) for o in top]
+
+    story.append(Paragraph("Recommendation", styles["Heading3"]))
+    rec = _REC_TMPL.substitute(
+        name=escape(chosen.name),
+        capex=capex_strs[0] if chosen is top[0] else fmt(chosen.capex),
+        savings=save_strs[0] if chosen is top[0] else fmt(chosen.annual_savings),
+        payback="—" if chosen.payback_years < 0 else f"{chosen.payback_years:.2f} years",
+        co2=f"{chosen.co2_saved_t:.0f}",
+        notes=escape(chosen.notes),
+    )
+    story.append(Paragraph(rec, styles["BodyText"]))
+    story.append(Spacer(1, 14))
+
+    story.append(Paragraph("Top options (ranked)", styles["Heading3"]))
+    table_data = [None] * (len(top) + 1)
+    table_data[0] = _RANK_TABLE_HEADER
+    for i, o in enumerate(top, start=1):
+        table_data[i] = [
+            str(i),
+            o.name,
+            capex_strs[i - 1],
+            save_strs[i - 1],
+            "∞" if o.payback_years < 0 else f"{o.payback_years:.2f}",
+            f"{o.co2_saved_t:.0f}",
+        ]
+    tt = Table(table_data, colWidths=[40, 180, 85, 95, 75, 80])
+    tt.setStyle(_RANK_TABLE_STYLE)
+    story.append(tt)
+    story.append(Spacer(1, 14))
+
+    story.append(Paragraph("Disclaimer", styles["Heading3"]))
+    story.append(Paragraph(_DISCLAIMER_TEXT, styles["BodyText"]))
+
+    doc.build(story)
+    return buff.getvalue()
@@ -0,0 +1,27 @@
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; without it the scoring kernel runs as plain Python
+    def njit(*args, **kwargs):
+        def decorator(fn):
+            return fn
+        return decorator
+
+# Kept out of app.py, which Streamlit re-executes on every rerun: as an imported module the compiled
+# dispatcher lives for the whole process, and numba's on-disk cache never re-imports the app script.
+@njit(cache=True, fastmath=True)
+def score_options(savings, payback, co2, annual_bill, co2_total):
+    """
+    Score each option: maximise savings, minimise payback, maximise CO2 saved.
+    Purely numeric (float arrays + scalars) so it can be compiled by numba.
+    """
+    n = savings.shape[0]
+    out = np.empty(n)
+    bill = max(annual_bill, 1.0)
+    co2_norm = max(co2_total, 1e-6)
+    for i in range(n):
+        pb = payback[i]
+        pb_score = max(0.0, 10.0 - pb) if pb >= 0.0 else 0.0  # <=10 years better; negative = no payback
+        out[i] = (savings[i]/bill)*10.0 + pb_score + (co2[i]/co2_norm)*5.0
+    return out